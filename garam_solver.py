@@ -12,10 +12,10 @@ https://www.garamgame.com/garam/garam_en_ligne/avance/index.html
 Usage
 -----
 Run the solver on a full grid (default):
-    $ python main.py
+    $ python garam_solver.py
 
 Run the solver on a single cycle:
-    $ python main.py --mini
+    $ python garam_solver.py --mini
 
 Notes
 -----
@@ -26,7 +26,8 @@ modules under ``solver/`` to build, solve, and display the puzzle:
 Modules
 -------
 builder : Functions to build the puzzle from user input.
-solver  : Core solving algorithm.
+solver  : Core solving algorithm (Z3 for full grids).
+native_solver : Backtracking solving algorithm, used by ``solver`` for cycles.
 display : Utilities to render puzzles and their solutions.
 
 @author:  Benjamin Clarenc
@@ -38,11 +39,15 @@ import argparse
 import sys
 import textwrap
 
-from solver.builder import build_puzzle
-from solver.solver import solve_puzzle
-from solver.display import display_init_and_sol, display_puzzle
 
-if __name__ == "__main__":
+def main() -> int:
+    """Parse the command line, then input, solve and display a puzzle.
+
+    Returns
+    -------
+    int
+        Exit status of the application.
+    """
     parser = argparse.ArgumentParser(
         description=textwrap.dedent("""
             Solves a full Garam grid or a single cycle (a.k.a. "mini-Garam") that has been inputed.
@@ -58,12 +63,19 @@ if __name__ == "__main__":
           python {parser.prog} --mini -> input a single cycle""")
 
     args = parser.parse_args()
-    shape = "cycle" if args.is_cycle else "grid"  # pylint: disable=invalid-name
+
+    # Imported only now so that `--help` does not pay for Tk and the solver
+    # pylint: disable=import-outside-toplevel
+    from solver.builder import build_puzzle
+    from solver.solver import solve_puzzle
+    from solver.display import display_init_and_sol, display_puzzle
+
+    shape = "cycle" if args.is_cycle else "grid"
 
     digits_in, ops = build_puzzle(shape)
     if not digits_in or not ops:
         # user closed the window :(
-        sys.exit(0)
+        return 0
 
     digits_out = solve_puzzle(shape, digits_in, ops)
 
@@ -71,4 +83,11 @@ if __name__ == "__main__":
         display_init_and_sol(shape, digits_in, digits_out, ops)
     else:
         # No solution found, display the initial puzzle anyway
+        print("No solution found")
         display_puzzle(shape, digits_in, ops)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,38 +10,36 @@ processing by the solver module.
 
 Modules
 -------
-tkinter : Used for creating the graphical interface.
+tkinter : Used for creating the graphical interface (only imported when building one).
 
 Functions
 ---------
 build_puzzle(shape) -> Tuple[List, List[str]]
-    Launch the UI to enter a puzzle.
-make_digit_entry() -> tk.Entry
-    Create and configure a new Entry widget for digit input.
-make_operator() -> tk.StringVar
-    Create a new operator selector variable (bound to an OptionMenu).
-make_label(text="=") -> tk.Label
-    Create a label widget, typically displaying "=".
-check_valid_input(val) -> bool
-    Validate digit inputs to ensure single-digit or empty string.
+    Launch the UI to enter a puzzle. The widgets (digit entries, read-only operator
+    selectors and "=" labels) are created by factories nested in it.
 """
+# pylint: disable=import-outside-toplevel
 
 from typing import List, Tuple
-import tkinter as tk
 
 from .puzzle import Puzzle
-from .constants import VALID_OPS
+from .constants import DEFAULT_OP, VALID_OPS
 
-# Main window
-root = tk.Tk()
-
-# Constants: graphical and operators
+# Constants: graphical (paddings are defined per element in puzzle.py)
 DGT_BG = "#ffffff"
-OPE_BG = "#cce5ff"
 DGT_BOX_WIDTH = 2
-PAD_DGT_X, PAD_DGT_Y = 5, 5
-PAD_OPE_X, PAD_OPE_Y = 3, 5
-PAD_EQL_X, PAD_EQL_Y = 5, 5
+
+# Tcl procedure validating digit inputs: a single (ASCII) digit or an empty string.
+# Defined in the Tcl interpreter of the window, it runs on each keystroke without
+# calling back into Python
+VALID_DIGIT_PROC = "proc valid_digit {P} {regexp {^[0-9]?$} $P}"
+
+# ttk style of the digit entries, configured once per window
+DGT_STYLE = "Digit.TEntry"
+
+# Options shared by all digit entries
+ENTRY_KW = {"width": DGT_BOX_WIDTH, "justify": "center", "style": DGT_STYLE,
+            "validate": "key", "validatecommand": ("valid_digit", "%P")}
 
 CYCLE_LAYOUT = {
     "cells": {"a1":(0,0), "b1":(0,2), "c1":(0,4),
@@ -55,7 +53,10 @@ CYCLE_LAYOUT = {
 
     "digits_order": ["a1", "b1", "c1", "a2", "c2", "a3", "c3", "a4", "b4", "c4"],
 
-    "ops_order": ["oab1", "oa12", "oc12", "oab4"]
+    "ops_order": ["oab1", "oa12", "oc12", "oab4"],
+
+    "max_row": 6,
+    "columnspan": 5
 }
 
 GRID_LAYOUT = {
@@ -97,31 +98,11 @@ GRID_LAYOUT = {
 
     "ops_order": ["oab1", "oef1", "oa12", "oc12", "oe12", "og12", "ocd2", "oab4", "oef4",
                   "ob45", "of45",
-                  "oab6", "oef6", "oa67", "oc67", "oe67", "og67", "ocd7", "oab9", "oef9"]
-}
-
-def check_valid_input(val) -> bool:
-    """Return True iff input is either a single digit or an empty string."""
-    return (val == "") or (val.isdigit() and len(val) == 1)
-
-valid_cmd = (root.register(check_valid_input), "%P")
-
-
-def make_digit_entry() -> tk.Entry:
-    """Create and return a new digit entry widget."""
-    return tk.Entry(root, width=2, justify="center", bg=DGT_BG,
-                    validate="key", validatecommand=valid_cmd)
-
-
-def make_operator() -> tk.StringVar:
-    """Create and return a new operator variable for OptionMenu."""
-    return tk.StringVar(value=VALID_OPS[0])
-
-
-def make_label(text="=") -> tk.Label:
-    """Create and return a label widget."""
-    return tk.Label(root, text=text, font=("Arial", 14))
+                  "oab6", "oef6", "oa67", "oc67", "oe67", "og67", "ocd7", "oab9", "oef9"],
 
+    "max_row": 16,
+    "columnspan": 13
+}
 
 def build_puzzle(shape) -> Tuple[List, List[str]]:
     """Create and display the UI for entering a puzzle (cycle or grid).
@@ -146,15 +127,45 @@ def build_puzzle(shape) -> Tuple[List, List[str]]:
     """
     assert shape in ["cycle", "grid"], "'shape' must be either 'cycle' or 'grid'"
 
+    import tkinter as tk
+    from tkinter import font as tkfont
+    from tkinter import ttk
+
+    # Main window, only created when a puzzle is actually requested
+    # (kept hidden while it is being filled, so that it is only drawn once)
+    root = tk.Tk()
+    root.withdraw()
+    root.tk.eval(VALID_DIGIT_PROC)
+    ttk.Style(root).configure(DGT_STYLE, fieldbackground=DGT_BG)
+
     if shape == "cycle":
         root.title("Mini-Garam")
         puzzle = Puzzle(CYCLE_LAYOUT)
-        columnspan = 5
     else:
         root.title("Full grid Garam")
         puzzle = Puzzle(GRID_LAYOUT)
-        columnspan = 13
-    puzzle.attach_widgets(root, make_digit_entry, make_operator, make_label, VALID_OPS)
+
+    # All widgets go in a frame that is only placed once they are all gridded,
+    # so that the geometry manager lays the form out in one pass
+    frame = tk.Frame(root)
+    # one named font shared by all labels
+    eql_font = tkfont.Font(root=root, family="Arial", size=14)
+
+    def make_digit_entry() -> ttk.Entry:
+        """Create and return a new digit entry widget."""
+        return ttk.Entry(frame, **ENTRY_KW)
+
+    def make_operator() -> ttk.Combobox:
+        """Create and return a new read-only operator combobox."""
+        combo = ttk.Combobox(frame, values=VALID_OPS, width=2, state="readonly")
+        combo.set(DEFAULT_OP)
+        return combo
+
+    def make_label(text="=") -> tk.Label:
+        """Create and return a label widget."""
+        return tk.Label(frame, text=text, font=eql_font)
+
+    puzzle.attach_widgets(make_digit_entry, make_operator, make_label)
 
     # Containers for digits and operators
     digits = []
@@ -162,18 +173,18 @@ def build_puzzle(shape) -> Tuple[List, List[str]]:
 
     def get_values() -> None:
         """Store input values from the GUI and close the window."""
-        digits.clear()
-        ops.clear()
-        digits.extend(puzzle.get_digits())
-        ops.extend(puzzle.get_ops())
+        digits[:] = puzzle.get_digits()
+        ops[:] = puzzle.get_ops()
         root.destroy()
 
     # OK button
-    btn_ok = tk.Button(root, text="Solve", justify="right", command=get_values)
-    last_row = max(c.row for c in puzzle.cells.values()) + 1
-    btn_ok.grid(row=last_row, column=0, columnspan=columnspan)
+    btn_ok = tk.Button(frame, text="Solve", justify="right", command=get_values)
+    btn_ok.grid(row=puzzle.max_row + 1, column=0, columnspan=puzzle.columnspan)
+    frame.grid(row=0, column=0)
 
     # Display window
+    root.update_idletasks()
+    root.deiconify()
     root.mainloop()
 
     return (digits, ops)
@@ -1,3 +1,4 @@
 """Shared constant(s)"""
 
-VALID_OPS = ["+", "-", "*"]
+VALID_OPS = ("+", "-", "*")
+DEFAULT_OP = VALID_OPS[0]  # operator initially selected in the UI
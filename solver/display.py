@@ -7,8 +7,10 @@ This module provides utilities for rendering Garam puzzles (cycles or full grids
 in a textual format suitable for terminal output. It can also display the initial
 puzzle alongside its solved version with color highlighting.
 """
-from math import ceil
-from typing import Any, Iterator, List
+from itertools import count
+from typing import List
+import re
+import sys
 import textwrap
 
 from .constants import VALID_OPS
@@ -17,28 +19,226 @@ NB_DIGITS_IN_CYCLE = 10
 NB_DIGITS_IN_GRID  = 44
 NB_OPS_IN_CYCLE = 4
 NB_OPS_IN_GRID  = 20
-VALID_NON_DIGITS = [" ", "_", "?", "X"]  # valid str values for digits
+VALID_NON_DIGITS = frozenset((" ", "_", "?", "X"))  # valid str values for digits
+VALID_DIGITS = frozenset(range(10))  # valid int values for digits
+VALID_OPS_SET = frozenset(VALID_OPS)
+NOT_FOUND = object()  # returned by the validation scans when all values are valid
 
 DEF = "\033[0m"  # default
 BLD = "\033[1m"  # bold
 RED = "\033[91m"
 YLW = "\033[93m"
 
-def get_next(it: Iterator[Any]) -> Any:
-    """Return the next element from an iterator.
+# Substitutions coloring the special characters of a rendered puzzle: each run of
+# same-colored characters on a row (spaces in between included) is wrapped once,
+# instead of each character; the codes inserted contain none of these characters
+COLOR_RUNS = ((re.compile(r"=(?: *=)*"), f"{BLD}\\g<0>{DEF}"),
+              (re.compile(r"_(?: *_)*"), f"{RED}\\g<0>{DEF}"),
+              (re.compile(r"[-+*](?: *[-+*])*"), f"{YLW}\\g<0>{DEF}"))
+
+
+def colorize(text: str) -> str:
+    """Return a rendered puzzle with its special characters colored."""
+    for pattern, repl in COLOR_RUNS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def make_template(raw: str, nb_digits: int, first_id: int = 0) -> str:
+    """Turn a puzzle drawing into a format string.
 
     Parameters
     ----------
-    it : iterator
-        An iterator object. The function advances the iterator by one step
-        and returns the next value.
+    raw : str
+        Drawing of the puzzle, where ``{d}`` and ``{o}`` stand for the next digit
+        and the next operator respectively.
+    nb_digits : int
+        Number of digits in the puzzle.
+    first_id : int, optional
+        Number of the first field, to fill the template with values that
+        come after others. Default is 0.
 
     Returns
     -------
-    object
-        The next element from the iterator.
+    str
+        Dedented format string with numbered fields (digits first, then operators),
+        to be filled with ``template.format(*digits, *ops)``.
+    """
+    digit_ids = count(first_id)
+    op_ids = count(first_id + nb_digits)
+
+    def number_field(match: re.Match) -> str:
+        field_id = next(digit_ids) if match.group(1) == "d" else next(op_ids)
+        return "{" + str(field_id) + "}"
+
+    return re.sub(r"\{([do])\}", number_field, textwrap.dedent(raw))
+
+
+CYCLE_DRAWING = """
+    {d} {o} {d} = {d}
+    {o}       {o}
+    {d}       {d}
+    =       =
+    {d}       {d}
+    {d} {o} {d} = {d}
+"""
+
+GRID_DRAWING = """
+    {d} {o} {d} = {d}       {d} {o} {d} = {d}
+    {o}       {o}       {o}       {o}
+    {d}       {d} {o} {d} = {d}       {d}
+    =       =       =       =
+    {d}       {d}       {d}       {d}
+    {d} {o} {d} = {d}       {d} {o} {d} = {d}
+        {o}               {o}
+        {d}               {d}
+        =               =
+    {d} {o} {d} = {d}       {d} {o} {d} = {d}
+    {o}       {o}       {o}       {o}
+    {d}       {d} {o} {d} = {d}       {d}
+    =       =       =       =
+    {d}       {d}       {d}       {d}
+    {d} {o} {d} = {d}       {d} {o} {d} = {d}
+"""
+
+CYCLE_TEMPLATE = make_template(CYCLE_DRAWING, NB_DIGITS_IN_CYCLE)
+GRID_TEMPLATE  = make_template(GRID_DRAWING,  NB_DIGITS_IN_GRID)
+
+
+GAP = 9  # number of spaces between a puzzle and its solution
+
+
+def get_width(template: str, nb_values: int) -> int:
+    """Return the width of a rendered puzzle (the length of its last, widest row).
+
+    Parameters
+    ----------
+    template : str
+        Format string of the puzzle (see ``make_template``).
+    nb_values : int
+        Number of digits and operators in the puzzle.
     """
-    return next(it)
+    return len(template.format(*"_" * nb_values).splitlines()[-1])
+
+
+def make_header(template: str, nb_values: int) -> str:
+    """Return the header line printed above a puzzle and its solution.
+
+    Parameters
+    ----------
+    template : str
+        Format string of the puzzle (see ``make_template``).
+    nb_values : int
+        Number of digits and operators in the puzzle.
+
+    Returns
+    -------
+    str
+        Header with its words centered over the puzzle, the arrow and the solution.
+    """
+    # align text with puzzles given puzzle shape, text to display and arbitrary gap;
+    # overkillingly generic because cumbersomely abstruse code is so funny-haha
+    # (all lengths are non-negative: x//2 and (x+1)//2 are the floor and ceiling of x/2)
+    word1, word2, word3 = "Puzzle", "->", "Solution"
+    width = get_width(template, nb_values)
+    offset      = (width-len(word1)+1)//2
+    space_left  = (width-len(word1))//2 + GAP//2     - (len(word2)+1)//2
+    space_right = (width-len(word3))//2 + (GAP+1)//2 - len(word2)//2
+    return "\n" + " "*offset + word1 + " "*space_left + word2 + " "*space_right + word3
+
+
+HEADERS = {"cycle": make_header(CYCLE_TEMPLATE, NB_DIGITS_IN_CYCLE + NB_OPS_IN_CYCLE),
+           "grid":  make_header(GRID_TEMPLATE,  NB_DIGITS_IN_GRID + NB_OPS_IN_GRID)}
+
+
+def make_side_by_side_template(raw: str, nb_digits: int, nb_ops: int) -> str:
+    """Turn a puzzle drawing into a format string showing a puzzle and its solution.
+
+    Parameters
+    ----------
+    raw : str
+        Drawing of the puzzle (see ``make_template``).
+    nb_digits : int
+        Number of digits in the puzzle.
+    nb_ops : int
+        Number of operators in the puzzle.
+
+    Returns
+    -------
+    str
+        Format string of the two puzzles side by side, separated by ``GAP`` spaces,
+        to be filled with ``template.format(*digits_in, *ops, *digits_out, *ops)``.
+    """
+    rows_init   = make_template(raw, nb_digits).splitlines()
+    rows_solved = make_template(raw, nb_digits, first_id=nb_digits + nb_ops).splitlines()
+    # each field is filled with a single character
+    row_widths = [len(re.sub(r"\{\d+\}", "_", row)) for row in rows_init]
+    width = row_widths[-1]
+    return "\n".join(row_i + " "*(max(width - row_width, 0) + GAP) + row_s
+                     for row_i, row_width, row_s in zip(rows_init, row_widths, rows_solved))
+
+
+SIDE_BY_SIDE_TEMPLATES = {
+    "cycle": make_side_by_side_template(CYCLE_DRAWING, NB_DIGITS_IN_CYCLE, NB_OPS_IN_CYCLE),
+    "grid":  make_side_by_side_template(GRID_DRAWING,  NB_DIGITS_IN_GRID,  NB_OPS_IN_GRID)}
+
+# Rows left blank by " " placeholders are emptied, as the rendered puzzles were dedented
+# (by textwrap.dedent) before templates were used: in a single puzzle, and in the
+# solution side of a puzzle and its solution (the puzzle side is padded anyway)
+BLANK_ROWS = re.compile(r"^ +$", re.MULTILINE)
+BLANK_SOLUTION_ROWS = {
+    "cycle": re.compile(rf"^(.{{{get_width(CYCLE_TEMPLATE, NB_DIGITS_IN_CYCLE + NB_OPS_IN_CYCLE) + GAP}}}) +$", re.MULTILINE),
+    "grid":  re.compile(rf"^(.{{{get_width(GRID_TEMPLATE,  NB_DIGITS_IN_GRID + NB_OPS_IN_GRID) + GAP}}}) +$", re.MULTILINE)}
+
+
+def check_puzzle(shape: str, digits: List, ops: List[str]) -> List[str]:
+    """Check the digits and operators of a puzzle to display.
+
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+    digits : list
+        Digits or placeholders of the puzzle.
+    ops : list of str
+        Operators of the puzzle.
+
+    Returns
+    -------
+    list of str
+        Operators, stripped.
+
+    Raises
+    ------
+    AssertionError
+        If the number or type of digits/operators is invalid.
+    """
+    assert shape in ["cycle", "grid"], "'shape' must be either 'cycle' or 'grid'"
+
+    if shape == "cycle":
+        exp_nb_digits = NB_DIGITS_IN_CYCLE
+        exp_nb_ops    = NB_OPS_IN_CYCLE
+    else:
+        exp_nb_digits = NB_DIGITS_IN_GRID
+        exp_nb_ops    = NB_OPS_IN_GRID
+
+    assert len(digits) == exp_nb_digits, f"Invalid number of digits: expected {exp_nb_digits}, got {len(digits)}"
+    assert len(ops) == exp_nb_ops, f"Invalid number of operators: expected {exp_nb_ops}, got {len(ops)}"
+    ops = [o.strip() for o in ops]
+
+    # scans skipped altogether, like the asserts, when running with `python -O`
+    if __debug__:
+        # type checked before the membership tests, so that floats (1.0) and bools (True)
+        # are not taken for digits
+        invalid_digit = next((d for d in digits
+                              if not ((isinstance(d, str) and d in VALID_NON_DIGITS)
+                                      or (isinstance(d, int) and not isinstance(d, bool) and d in VALID_DIGITS))),
+                             NOT_FOUND)
+        assert invalid_digit is NOT_FOUND, f"Invalid digit: {invalid_digit!r}"
+        invalid_op = next((o for o in ops if o not in VALID_OPS_SET), NOT_FOUND)
+        assert invalid_op is NOT_FOUND, f"Invalid operator: {invalid_op!r}"
+
+    return ops
 
 
 def display_puzzle(shape: str, digits: List, ops: List[str], bool_print=True) -> str:
@@ -94,54 +294,12 @@ def display_puzzle(shape: str, digits: List, ops: List[str], bool_print=True) ->
     AssertionError
         If the number or type of digits/operators is invalid.
     """
-    assert shape in ["cycle", "grid"], "'shape' must be either 'cycle' or 'grid'"
+    ops = check_puzzle(shape, digits, ops)
 
-    if shape == "cycle":
-        exp_nb_digits = NB_DIGITS_IN_CYCLE
-        exp_nb_ops    = NB_OPS_IN_CYCLE
-    else:
-        exp_nb_digits = NB_DIGITS_IN_GRID
-        exp_nb_ops    = NB_OPS_IN_GRID
-
-    assert len(digits) == exp_nb_digits, f"Invalid number of digits: expected {exp_nb_digits}, got {len(digits)}"
-    invalid_digits = [d for d in digits if not(d in VALID_NON_DIGITS or (isinstance(d, int) and (0 <= d <= 9)))]
-    assert not invalid_digits, f"Invalid digit(s): {invalid_digits}"
-
-    assert len(ops) == exp_nb_ops, f"Invalid number of operators: expected {exp_nb_ops}, got {len(ops)}"
-    ops = [o.strip() for o in ops]
-    invalid_ops = [o for o in ops if o not in VALID_OPS]
-    assert not invalid_ops, f"Invalid operator(s): {invalid_ops}"
-
-    dit = iter(digits)  # need short..
-    oit = iter(ops)     # ..names sry
-
-    if shape == "cycle":
-        puzzle_str = textwrap.dedent(f"""
-            {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}
-            {get_next(oit)}       {get_next(oit)}
-            {get_next(dit)}       {get_next(dit)}
-            =       =
-            {get_next(dit)}       {get_next(dit)}
-            {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}
-        """)
-    else:
-        puzzle_str = textwrap.dedent(f"""
-            {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}       {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}
-            {get_next(oit)}       {get_next(oit)}       {get_next(oit)}       {get_next(oit)}
-            {get_next(dit)}       {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}       {get_next(dit)}
-            =       =       =       =
-            {get_next(dit)}       {get_next(dit)}       {get_next(dit)}       {get_next(dit)}
-            {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}       {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}
-                {get_next(oit)}               {get_next(oit)}
-                {get_next(dit)}               {get_next(dit)}
-                =               =
-            {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}       {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}
-            {get_next(oit)}       {get_next(oit)}       {get_next(oit)}       {get_next(oit)}
-            {get_next(dit)}       {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}       {get_next(dit)}
-            =       =       =       =
-            {get_next(dit)}       {get_next(dit)}       {get_next(dit)}       {get_next(dit)}
-            {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}       {get_next(dit)} {get_next(oit)} {get_next(dit)} = {get_next(dit)}
-        """)
+    template = CYCLE_TEMPLATE if shape == "cycle" else GRID_TEMPLATE
+    puzzle_str = template.format(*digits, *ops)
+    if " " in digits:
+        puzzle_str = BLANK_ROWS.sub("", puzzle_str)
 
     if bool_print:
         print(puzzle_str)
@@ -149,7 +307,6 @@ def display_puzzle(shape: str, digits: List, ops: List[str], bool_print=True) ->
     return puzzle_str
 
 
-# pylint: disable=too-many-locals
 def display_init_and_sol(shape: str, digits_in: List, digits_out: List[int], ops: List[str]) -> None:
     """Display a puzzle alongside its solved version on the terminal
 
@@ -167,25 +324,11 @@ def display_init_and_sol(shape: str, digits_in: List, digits_out: List[int], ops
     ops : list of str
         List of operators used in the puzzle.
     """
-    str_init   = display_puzzle(shape, digits_in,  ops, False)
-    str_solved = display_puzzle(shape, digits_out, ops, False)
-
-    color_map = {"=": f"{BLD}={DEF}",
-                 "_": f"{RED}_{DEF}",
-                 "+": f"{YLW}+{DEF}",
-                 "-": f"{YLW}-{DEF}",
-                 "*": f"{YLW}*{DEF}"}
+    ops = check_puzzle(shape, digits_in, ops)
+    check_puzzle(shape, digits_out, ops)
 
-    # align text with puzzles given puzzle shape, text to display and arbitrary gap;
-    # overkillingly generic because cumbersomely abstruse code is so funny-haha
-    word1, word2, word3 = "Puzzle", "->", "Solution"
-    gap = 9
-    width = len(str_init.splitlines()[-1])
-    offset      = int(ceil((width-len(word1))/2))
-    space_left  = int((width-len(word1))/2) + int(gap/2)  - ceil(len(word2)/2)
-    space_right = int((width-len(word3))/2) + ceil(gap/2) - int(len(word2)/2)
-    print(f"\n{" "*offset}{word1}{" "*space_left}{word2}{" "*space_right}{word3}")
-    for row_i, row_s in zip(str_init.splitlines(), str_solved.splitlines()):
-        row_out = f"{row_i.ljust(width)}{" "*gap}{row_s}"
-        row_colored = "".join(color_map.get(c, c) for c in row_out)
-        print(row_colored)
+    # initial puzzle on the left, solved one on the right
+    rows_out = SIDE_BY_SIDE_TEMPLATES[shape].format(*digits_in, *ops, *digits_out, *ops)
+    if " " in digits_out:
+        rows_out = BLANK_SOLUTION_ROWS[shape].sub(r"\1", rows_out)
+    sys.stdout.write(f"{HEADERS[shape]}\n{colorize(rows_out)}\n")
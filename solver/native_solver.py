@@ -0,0 +1,317 @@
+"""
+Methods for solving Garam puzzles (cycles and full grids) without Z3.
+
+This module implements a dedicated backtracking search over the unknown digits,
+after pruning their domains by constraint propagation.
+Digits are handled as plain integers (-1 for an unknown cell) and operators are
+mapped once to a precomputed table of admissible results, so checking an equation
+is a single lookup.
+
+``solver.solve_puzzle`` (used by the command-line tool) hands cycles to this search
+and uses the propagation to bound the digits of grids given to Z3;
+``solve_puzzle_native`` solves both shapes without Z3.
+"""
+
+import logging
+import operator
+from typing import List, Optional, Tuple
+
+from .constants import VALID_OPS
+
+LOGGER = logging.getLogger(__name__)
+
+# Equations as tuples of digit indices (``a $ b = c`` or ``a $ b = cd``),
+# in the same order as the operators of the puzzle
+CYCLE_EQUATIONS = ((0, 1, 2), (0, 3, 5, 7), (2, 4, 6, 9), (7, 8, 9))
+
+GRID_EQUATIONS = ((0, 1, 2),       (3, 4, 5),
+                  (0, 6, 11, 15),  (2, 7, 12, 17),  (3, 9, 13, 18),  (5, 10, 14, 20),
+                  (7, 8, 9),       (15, 16, 17),    (18, 19, 20),
+                  (16, 21, 24),    (19, 22, 27),
+                  (23, 24, 25),    (26, 27, 28),
+                  (23, 29, 34, 38), (25, 30, 35, 40), (26, 32, 36, 41), (28, 33, 37, 43),
+                  (30, 31, 32),    (38, 39, 40),    (41, 42, 43))
+
+# Equations involving each digit: WATCHERS[i] lists the indices of the equations
+# in which digit i appears
+CYCLE_WATCHERS = tuple(tuple(k for k, eqn in enumerate(CYCLE_EQUATIONS) if i in eqn)
+                       for i in range(10))
+GRID_WATCHERS = tuple(tuple(k for k, eqn in enumerate(GRID_EQUATIONS) if i in eqn)
+                      for i in range(44))
+
+# Indices of the digits in the tens position, which cannot be zero
+CYCLE_TENS = (5, 6)
+GRID_TENS = (11, 12, 13, 14, 34, 35, 36, 37)
+
+# Arithmetic functions indexed by operator code (same order as VALID_OPS)
+OP_FUNCS = (operator.add, operator.sub, operator.mul)
+
+# Table of admissible results: ADMISSIBLE[code][10*a + b] has bit r set iff a $ b = r,
+# with r a one- or two-digit number (0 to 99)
+ADMISSIBLE = tuple(tuple(1 << op_func(a, b) if 0 <= op_func(a, b) <= 99 else 0
+                         for a in range(10) for b in range(10))
+                   for op_func in OP_FUNCS)
+
+# Same table with the digits of the results: RESULT_DIGITS[code][10*a + b] is
+# (tens, units) of a $ b, or None if the result is not a one- or two-digit number
+RESULT_DIGITS = tuple(tuple(divmod(res.bit_length() - 1, 10) if res else None for res in table)
+                      for table in ADMISSIBLE)
+
+# Values of each 10-bit domain: VALUES_OF_DOMAIN[dom] lists the v such that bit v is set
+VALUES_OF_DOMAIN = tuple(tuple(v for v in range(10) if dom >> v & 1) for dom in range(1 << 10))
+
+
+# pylint: disable=too-many-locals
+def propagate(domains: List[int], equations: Tuple[Tuple[int, ...], ...],
+              results: List[Tuple[Optional[Tuple[int, int]], ...]],
+              watchers: Tuple[Tuple[int, ...], ...]) -> bool:
+    """Prune the digit domains in place until they are arc consistent (AC-3).
+
+    Each domain is a 10-bit mask (bit v set iff the digit can be v). A value is
+    removed when no combination of values of the other digits of an equation
+    satisfies it; the equations sharing a pruned digit are then checked again.
+
+    Parameters
+    ----------
+    domains : list of int
+        Domain bitmask of each digit, updated in place.
+    equations : tuple of tuple of int
+        Indices of the digits involved in each equation.
+    results : list of tuple
+        Digits of the results of each equation, taken from ``RESULT_DIGITS``.
+    watchers : tuple of tuple of int
+        Indices of the equations involving each digit (``CYCLE_WATCHERS`` or
+        ``GRID_WATCHERS``).
+
+    Returns
+    -------
+    bool
+        False if a domain became empty, i.e. the puzzle has no solution.
+    """
+    queue = list(range(len(equations)))
+    queued = set(queue)
+    while queue:
+        k = queue.pop()
+        queued.discard(k)
+        eqn, result = equations[k], results[k]
+        tens = eqn[2] if len(eqn) == 4 else -1
+        units = eqn[-1]
+        dom_b, dom_u = domains[eqn[1]], domains[units]
+        dom_t = domains[tens] if tens >= 0 else 1  # one-digit result: tens digit is 0
+        values_b = VALUES_OF_DOMAIN[dom_b]
+        supp_a = supp_b = supp_t = supp_u = 0
+        for a in VALUES_OF_DOMAIN[domains[eqn[0]]]:
+            row = 10*a
+            for b in values_b:
+                res = result[row + b]
+                if res and dom_t >> res[0] & 1 and dom_u >> res[1] & 1:
+                    supp_a |= 1 << a
+                    supp_b |= 1 << b
+                    supp_t |= 1 << res[0]
+                    supp_u |= 1 << res[1]
+
+        for i, supp in ((eqn[0], supp_a), (eqn[1], supp_b), (tens, supp_t), (units, supp_u)):
+            if i < 0 or domains[i] & supp == domains[i]:
+                continue
+            domains[i] &= supp
+            if not domains[i]:
+                return False
+            for j in watchers[i]:
+                if j != k and j not in queued:
+                    queue.append(j)
+                    queued.add(j)
+    return True
+
+
+def search_order(digits: List[int], equations: Tuple[Tuple[int, ...], ...]) -> List[int]:
+    """Return the indices of the unknown digits, in the order they should be assigned.
+
+    Equations are completed one at a time, always picking the one with the fewest
+    unassigned digits left, so that each equation is checked as early as possible.
+
+    Parameters
+    ----------
+    digits : list of int
+        Digits of the puzzle, -1 for unknown ones.
+    equations : tuple of tuple of int
+        Indices of the digits involved in each equation.
+    """
+    remaining = {i for i, d in enumerate(digits) if d < 0}
+    order = []
+    while remaining:
+        eqn = min((e for e in equations if remaining.intersection(e)),
+                  key=lambda e: len(remaining.intersection(e)))
+        for i in eqn:
+            if i in remaining:
+                order.append(i)
+                remaining.remove(i)
+    return order
+
+
+def search_plan(digits: List[int], equations: Tuple[Tuple[int, ...], ...],
+                tables: List[Tuple[int, ...]]) -> Tuple[List[int], List[List[Tuple]]]:
+    """Return the search order of the unknown digits and the equations to check at each depth.
+
+    Each equation is attached to the depth at which its last unknown digit is
+    assigned, as (a, b, tens of result, units of result, table, bitmask of the
+    depths of its other unknown digits).
+
+    Parameters
+    ----------
+    digits : list of int
+        Digits of the puzzle, -1 for unknown ones, followed by a trailing 0 that
+        stands for the missing tens digit of one-digit results.
+    equations : tuple of tuple of int
+        Indices of the digits involved in each equation.
+    tables : list of tuple of int
+        Admissible results of each equation, taken from ``ADMISSIBLE``.
+    """
+    zero = len(digits) - 1
+    unknowns = search_order(digits, equations)
+    depth_of = {i: depth for depth, i in enumerate(unknowns)}
+    checks = [[] for _ in unknowns]
+    for eqn, table in zip(equations, tables):
+        depths = [depth_of[i] for i in eqn if i in depth_of]
+        if depths:
+            last = max(depths)
+            others = sum(1 << d for d in depths if d != last)
+            rhs = (zero, eqn[2]) if len(eqn) == 3 else eqn[2:]
+            checks[last].append((eqn[0], eqn[1], *rhs, table, others))
+    return unknowns, checks
+
+
+def prune_domains(shape: str, digits_in: List, ops: List[str]) -> List[int]:
+    """Return the domains of the digits of a puzzle, pruned by ``propagate``.
+
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+    digits_in : list
+        List of 10 (cycle) or 44 (grid) input digits and placeholders ``"_"``.
+    ops : list of str
+        List of 4 (cycle) or 20 (grid) arithmetic operators.
+
+    Returns
+    -------
+    list of int
+        Domain bitmask of each digit (bit v set iff the digit can be v),
+        or an empty list if the puzzle has no solution.
+    """
+    if shape == "cycle":
+        equations, tens, watchers = CYCLE_EQUATIONS, CYCLE_TENS, CYCLE_WATCHERS
+    else:
+        equations, tens, watchers = GRID_EQUATIONS, GRID_TENS, GRID_WATCHERS
+
+    domains = [1 << d if isinstance(d, int) else (0b1111111110 if i in tens else 0b1111111111)
+               for i, d in enumerate(digits_in)]
+    results = [RESULT_DIGITS[VALID_OPS.index(op.strip())] for op in ops]
+    return domains if propagate(domains, equations, results, watchers) else []
+
+
+# pylint: disable=too-many-locals
+def find_solution(shape: str, digits_in: List, ops: List[str]) -> List[int]:
+    """Solve a cycle or a full grid with a backtracking search, without printing.
+
+    The domains of the digits are first pruned by ``propagate``. The remaining unknown
+    digits are then assigned equation by equation (see ``search_order``), and each
+    equation is checked as soon as its last unknown digit has been assigned. The
+    search uses an explicit stack instead of recursion, and conflict-directed
+    backjumping: on a dead end, it jumps back to the deepest digit involved in a
+    failed equation instead of the previous one.
+
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+    digits_in : list
+        List of 10 (cycle) or 44 (grid) input digits and placeholders ``"_"``,
+        in the same order as for ``solver.solve_puzzle``.
+    ops : list of str
+        List of 4 (cycle) or 20 (grid) arithmetic operators (among
+        ``"+"``, ``"-"``, ``"*"``).
+
+    Returns
+    -------
+    list of int
+        List of solved digits, or an empty list if no solution is found.
+    """
+    assert shape in ["cycle", "grid"], "'shape' must be either 'cycle' or 'grid'"
+
+    equations = CYCLE_EQUATIONS if shape == "cycle" else GRID_EQUATIONS
+    tables = [ADMISSIBLE[VALID_OPS.index(op.strip())] for op in ops]
+
+    # Domains of the digits, pruned before the search; digits left with a single
+    # possible value are known from then on
+    domains = prune_domains(shape, digits_in, ops)
+    if not domains:
+        return []
+
+    # Extra trailing 0: stands for the missing tens digit of one-digit results
+    digits = [dom.bit_length() - 1 if dom & (dom - 1) == 0 else -1 for dom in domains] + [0]
+    zero = len(digits) - 1
+    unknowns, checks = search_plan(digits, equations, tables)
+
+    # conflicts[d]: bitmask of the depths that caused a value to fail at depth d
+    conflicts = [0] * len(unknowns)
+    depth = 0
+    while 0 <= depth < len(unknowns):
+        idx = unknowns[depth]
+        dom = domains[idx]
+        val = digits[idx] + 1
+        while val <= 9:
+            if not dom >> val & 1:
+                val += 1
+                continue
+            digits[idx] = val
+            # All equations completed at this depth are checked in a single loop
+            for a, b, t, u, table, others in checks[depth]:
+                if not table[10*digits[a] + digits[b]] >> (10*digits[t] + digits[u]) & 1:
+                    conflicts[depth] |= others
+                    break
+            else:
+                break
+            val += 1
+        if val <= 9:
+            depth += 1
+            continue
+
+        # Dead end: jump back to the deepest digit in conflict, forget the ones after it
+        conflict = conflicts[depth]
+        target = conflict.bit_length() - 1
+        for d in range(target + 1, depth + 1):
+            digits[unknowns[d]] = -1
+            conflicts[d] = 0
+        if target >= 0:
+            conflicts[target] |= conflict & ~(1 << target)
+        depth = target
+
+    if depth < 0:
+        return []
+
+    return digits[:zero]
+
+
+def solve_puzzle_native(shape: str, digits_in: List, ops: List[str]) -> List[int]:
+    """Solve a cycle or a full grid with a backtracking search.
+
+    See ``find_solution``; a debug message is logged if there is no solution.
+
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+    digits_in : list
+        List of 10 (cycle) or 44 (grid) input digits and placeholders ``"_"``.
+    ops : list of str
+        List of 4 (cycle) or 20 (grid) arithmetic operators.
+
+    Returns
+    -------
+    list of int
+        List of solved digits, or an empty list if no solution is found.
+    """
+    digits_out = find_solution(shape, digits_in, ops)
+    if not digits_out:
+        LOGGER.debug("No solution found")
+    return digits_out
@@ -1,9 +1,21 @@
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-positional-arguments
 
+from __future__ import annotations
+
 from dataclasses import dataclass
-from typing import Dict, Callable, List, Optional
-import tkinter as tk
+from functools import cached_property
+from typing import TYPE_CHECKING, ClassVar, Dict, Callable, List, Optional
+
+from .constants import DEFAULT_OP
+
+if TYPE_CHECKING:
+    import tkinter as tk
+    from tkinter import ttk
+
+# Digit of each valid entry value; any other value is an unknown digit
+DIGIT_VALUES = {str(i): i for i in range(10)}
+
 
 @dataclass
 class Element:
@@ -19,25 +31,21 @@ class Cell(Element):
     """Represent a cell that visually contains a digit."""
     digit_in:  Optional[str] = None  # initial digit, or "_" if to be solved for
     digit_out: Optional[str] = None  # digit in the solved puzzle
-    padx: int = 5
-    pady: int = 5
+    PAD: ClassVar[Dict[str, int]] = {"padx": 5, "pady": 5}  # grid() paddings
 
 
 @dataclass
 class Operator(Element):
     """Operator between 2 cells."""
-    var: Optional[object] = None  # tk.StringVar (if a widget is attached)
     symbol: Optional[str] = None  # "+", "-" or "*"
-    padx: int = 3
-    pady: int = 5
+    PAD: ClassVar[Dict[str, int]] = {"padx": 3, "pady": 5}  # grid() paddings
 
 
 @dataclass
 class EqualLabel(Element):
     """'=' sign between an expression and its numerical value."""
     text: str = "="
-    padx: int = 5
-    pady: int = 5
+    PAD: ClassVar[Dict[str, int]] = {"padx": 5, "pady": 5}  # grid() paddings
 
 
 class Puzzle:
@@ -57,57 +65,53 @@ class Puzzle:
         }
         self.digits_order: List[str] = layout["digits_order"]
         self.ops_order:    List[str] = layout["ops_order"]
-
-    def attach_widgets(self, root: tk.Tk,
-                       make_digit_entry: Callable[[], tk.Entry],
-                       make_operator: Callable[[], tk.StringVar],
-                       make_label: Callable[[str], tk.Label],
-                       valid_ops: List[str]):
+        self.max_row:    int = layout["max_row"]     # last row used by the elements
+        self.columnspan: int = layout["columnspan"]  # number of columns used by the elements
+
+    @cached_property
+    def ordered_cells(self) -> List[Cell]:
+        """Cells in the order expected by the solver (resolved on first access)."""
+        return [self.cells[name] for name in self.digits_order]
+
+    @cached_property
+    def ordered_ops(self) -> List[Operator]:
+        """Operators in the order expected by the solver (resolved on first access)."""
+        return [self.ops[name] for name in self.ops_order]
+
+    def attach_widgets(self,
+                       make_digit_entry: Callable[[], ttk.Entry],
+                       make_operator: Callable[[], ttk.Combobox],
+                       make_label: Callable[[str], tk.Label]):
         """Create and place widgets for each element.
 
-        - make_digit_entry: callable to create a tk.Entry
-        - make_operator:    callable to create and return a tk.StringVar
+        - make_digit_entry: callable to create a ttk.Entry
+        - make_operator:    callable to create a ttk.Combobox of the valid operators
         - make_label:       callable to create a tk.Label
-        - valid_ops:        list of valid operators for tk.OptionMenu
         """
         # cells -> Entry
         for cell in self.cells.values():
             widget = make_digit_entry()
             cell.widget = widget
-            widget.grid(row=cell.row, column=cell.col, padx=cell.padx, pady=cell.pady)
+            widget.grid(row=cell.row, column=cell.col, **cell.PAD)
 
-        # operators -> StringVar + OptionMenu
+        # operators -> Combobox
         for op in self.ops.values():
-            var = make_operator()
-            op.var = var
-            op.widget = tk.OptionMenu(root, var, *valid_ops)
-            op.widget.grid(row=op.row, column=op.col, padx=op.padx, pady=op.pady)
+            widget = make_operator()
+            op.widget = widget
+            widget.grid(row=op.row, column=op.col, **op.PAD)
 
         # labels -> Label
         for lbl in self.labels.values():
             widget = make_label(lbl.text)
             lbl.widget = widget
-            widget.grid(row=lbl.row, column=lbl.col, padx=lbl.padx, pady=lbl.pady)
+            widget.grid(row=lbl.row, column=lbl.col, **lbl.PAD)
 
     def get_digits(self):
         """Return the list of digits in the expected order."""
-        out = []
-        for name in self.digits_order:
-            key = self.cells[name]
-            if key.widget:
-                val = key.widget.get().strip()
-            else:
-                val = key.digit_in if key.digit_in is not None else "_"
-            out.append(int(val) if val.isdigit() else "_")
-        return out
+        return [DIGIT_VALUES.get(c.widget.get() if c.widget else c.digit_in, "_")
+                for c in self.ordered_cells]
 
     def get_ops(self):
         """Return the list of operators in the expected order."""
-        out = []
-        for name in self.ops_order:
-            o = self.ops[name]
-            if o.var:
-                out.append(o.var.get().strip())
-            else:
-                out.append(o.symbol if o.symbol is not None else "+")
-        return out
+        return [o.widget.get() if o.widget else (o.symbol if o.symbol is not None else DEFAULT_OP)
+                for o in self.ordered_ops]
@@ -1,17 +1,61 @@
 """
-Methods for solving Garam puzzles (cycles and full grids) using Z3.
+Methods for solving Garam puzzles (cycles and full grids).
 
 This module defines helper functions to translate Garam constraints into Z3 formulas and solve them.
+Full grids are solved with Z3, while cycles, which are small enough, are handed to the backtracking
+search of ``native_solver``.
 """
 
-from typing import Dict, List, Tuple
-from z3 import Int, Solver, sat
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+import logging
+import operator
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+from z3 import BitVec, BitVecRef, BoolRef, Concat, Solver, ULE, sat
 
 from .constants import VALID_OPS
+from .native_solver import find_solution, prune_domains
 
+LOGGER = logging.getLogger(__name__)
 
-def build_z3_vars(shape: str) -> Tuple[Dict[str, Int], List[Int], List[Int]]:
-    """Create Z3 integer variables for a cycle or a full grid.
+# Width of the bit-vectors holding the digits: large enough for any result
+# (up to 9*9 = 81) and for two-digit numbers (up to 99), and such that a negative
+# difference wraps around to 119 or more, so it never equals a valid result
+DIGIT_BITS = 7
+
+# Arithmetic function of each valid operator (applied to Z3 expressions)
+OP_FUNCS_BY_SYMBOL = dict(zip(VALID_OPS, (operator.add, operator.sub, operator.mul)))
+
+# Digit names, in the order of the digits of a puzzle
+CYCLE_DIGIT_NAMES = ("a1","b1","c1","a2","c2","a3","c3","a4","b4","c4")
+GRID_DIGIT_NAMES  = ("a1","b1","c1","e1","f1","g1","a2","c2","d2","e2","g2","a3","c3","e3","g3",
+                     "a4","b4","c4","e4","f4","g4","b5","f5","a6","b6","c6","e6","f6","g6",
+                     "a7","c7","d7","e7","g7","a8","c8","e8","g8","a9","b9","c9","e9","f9","g9")
+
+# Equations as (names of the digits, index of the operator in the puzzle's ops)
+CYCLE_EQN_TEMPLATE = (
+    (("a1","b1","c1"), 0), (("a4","b4","c4"), 3),
+    (("a1","a2","a3","a4"), 1), (("c1","c2","c3","c4"), 2))
+
+GRID_EQN_TEMPLATE = (
+    (("a1","b1","c1"), 0),       (("e1","f1","g1"), 1),  (("c2","d2","e2"), 6),
+    (("a4","b4","c4"), 7),       (("e4","f4","g4"), 8),
+    (("a6","b6","c6"), 11),      (("e6","f6","g6"), 12), (("c7","d7","e7"), 17),
+    (("a9","b9","c9"), 18),      (("e9","f9","g9"), 19),
+    (("a1","a2","a3","a4"), 2),  (("c1","c2","c3","c4"), 3),
+    (("e1","e2","e3","e4"), 4),  (("g1","g2","g3","g4"), 5),
+    (("b4","b5","b6"), 9),       (("f4","f5","f6"), 10),
+    (("a6","a7","a8","a9"), 13), (("c6","c7","c8","c9"), 14),
+    (("e6","e7","e8","e9"), 15), (("g6","g7","g8","g9"), 16))
+
+
+@lru_cache(maxsize=None)
+def build_z3_vars(shape: str) -> Tuple[Dict[str, BitVecRef], List[BitVecRef]]:
+    """Create Z3 bit-vector variables for a cycle or a full grid.
+
+    The variables are only created once per shape: the returned containers are
+    shared between calls and must not be modified.
 
     Parameters
     ----------
@@ -20,46 +64,76 @@ def build_z3_vars(shape: str) -> Tuple[Dict[str, Int], List[Int], List[Int]]:
 
     Returns
     -------
-    zvars_dict : dict[str, Int]
-        Dictionary mapping variable names to their Z3 integer objects.
-    zvars : list[Int]
-        List of Z3 integer variables in the order defined by the puzzle layout.
-    tens : list[Int]
-        List of variables that represent digits in the tens position,
-        and therefore that cannot be zero.
+    zvars_dict : dict[str, BitVecRef]
+        Dictionary mapping variable names to their Z3 bit-vector objects.
+    zvars : list[BitVecRef]
+        List of Z3 bit-vector variables in the order defined by the puzzle layout.
     """
-    if shape == "cycle":
-        digit_names = ["a1","b1","c1","a2","c2","a3","c3","a4","b4","c4"]
-        ten_names   = ["a3","c3"]
-    else:
-        digit_names = ["a1","b1","c1","e1","f1","g1","a2","c2","d2","e2","g2","a3","c3","e3","g3",
-                       "a4","b4","c4","e4","f4","g4","b5","f5","a6","b6","c6","e6","f6","g6",
-                       "a7","c7","d7","e7","g7","a8","c8","e8","g8","a9","b9","c9","e9","f9","g9"]
-        ten_names   = ["a3","c3","e3","g3","a8","c8","e8","g8"]
+    digit_names = CYCLE_DIGIT_NAMES if shape == "cycle" else GRID_DIGIT_NAMES
 
-    zvars_dict = {name: Int(name) for name in digit_names}
+    zvars_dict = {name: BitVec(name, DIGIT_BITS) for name in digit_names}
     zvars = [zvars_dict[name] for name in digit_names]
-    tens  = [zvars_dict[name] for name in ten_names]
 
-    return (zvars_dict, zvars, tens)
+    return (zvars_dict, zvars)
+
+
+@lru_cache(maxsize=None)
+def build_packed_digits(shape: str) -> BitVecRef:
+    """Return all the digit variables of a puzzle concatenated into one bit-vector.
+
+    The first digit is in the lowest ``DIGIT_BITS`` bits, so that a model can be
+    read with a single evaluation instead of one per digit.
+
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+    """
+    _, zvars = build_z3_vars(shape)
+    return Concat(*reversed(zvars))
 
 
-def add_equation_constraint(digits: List, op: str, solver: Solver) -> None:
-    """Add an arithmetic constraint of the form ``a $ b = c`` or ``a $ b = cd``.
+@lru_cache(maxsize=None)
+def build_digit_constraints(shape: str) -> Tuple[Tuple[Tuple[BoolRef, ...], ...], ...]:
+    """Return every bound constraint that can be put on the digits of a puzzle.
 
-    The function encodes one equation of the puzzle in the Z3 solver.
+    The constraints are only built once per shape, and then picked by value
+    (see ``solve_puzzle_cached``) instead of being rebuilt for each puzzle.
+
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+
+    Returns
+    -------
+    tuple of tuple
+        For each digit variable ``z``, in the order of the puzzle layout, the tuple
+        ``(equal, at_least, at_most)`` where ``equal[v]`` is ``z == v``,
+        ``at_least[v]`` is ``v <= z`` and ``at_most[v]`` is ``z <= v`` (unsigned),
+        for v from 0 to 9.
+    """
+    _, zvars = build_z3_vars(shape)
+    return tuple((tuple(z == v for v in range(10)),
+                  tuple(ULE(v, z) for v in range(10)),
+                  tuple(ULE(z, v) for v in range(10)))
+                 for z in zvars)
+
+
+def make_equation_constraint(digits: List, op: str) -> BoolRef:
+    """Return an arithmetic constraint of the form ``a $ b = c`` or ``a $ b = cd``.
+
+    The function encodes one equation of the puzzle as a Z3 expression.
     The right-hand side may be a one- or two-digit number depending on the
     length of ``digits``.
 
     Parameters
     ----------
-    digits : list of z3.IntRef
-        Z3 integer variables representing the digits of the equation.
+    digits : list of z3.BitVecRef
+        Z3 bit-vector variables representing the digits of the equation.
         Must contain either 3 or 4 elements.
     op : str
         Arithmetic operator (among ``"+"``, ``"-"``, ``"*"``).
-    solver : z3.Solver
-        The Z3 solver where the constraint will be added.
 
     Raises
     ------
@@ -68,24 +142,18 @@ def add_equation_constraint(digits: List, op: str, solver: Solver) -> None:
 
     Returns
     -------
-    None
-        The constraint is added directly to the provided solver.
+    z3.BoolRef
+        The constraint, to be added to a solver.
     """
-    assert len(digits) in [3,4], "Invalid digits in equation constraint"
-    assert op in VALID_OPS, f"Invalid operator {op} in equation constraint"
+    assert len(digits) in (3, 4), "Invalid digits in equation constraint"
+    assert op in OP_FUNCS_BY_SYMBOL, f"Invalid operator {op} in equation constraint"
 
     lhs = digits[-1] if (len(digits) == 3) else 10*digits[-2] + digits[-1]
-    if op == "+":
-        solver.add(digits[0] + digits[1] == lhs)
-    elif op == "-":
-        solver.add(digits[0] - digits[1] == lhs)
-    elif op == "*":
-        solver.add(digits[0] * digits[1] == lhs)
+    return OP_FUNCS_BY_SYMBOL[op](digits[0], digits[1]) == lhs
 
 
-# pylint: disable=too-many-locals
-def build_equation_constraints(shape: str, ops: List[str], zvars_dict: Dict[str, Int]
-                               ) -> List[Tuple[List[Int], str]]:
+def build_equation_constraints(shape: str, ops: List[str], zvars_dict: Dict[str, BitVecRef]
+                               ) -> List[Tuple[List[BitVecRef], str]]:
     """Return a list of equation constraints for a puzzle.
 
     Each constraint is a tuple of Z3 variables involved in the equation
@@ -97,37 +165,19 @@ def build_equation_constraints(shape: str, ops: List[str], zvars_dict: Dict[str,
         Shape of the puzzle.
     ops : list of str
         List of 4 (cycle) or 20 (grid) arithmetic operators for the equations.
-    zvars_dict : dict[str, Int]
-        Dictionary mapping variable names to their Z3 integer objects.
+    zvars_dict : dict[str, BitVecRef]
+        Dictionary mapping variable names to their Z3 bit-vector objects.
 
     Returns
     -------
-    list of tuple(list[Int], str)
+    list of tuple(list[BitVecRef], str)
         Each tuple contains the elements for one constraint:
         - the list of Z3 variables involved in the equation
         - the operator as a string
     """
-    if shape == "cycle":
-        oab1, oa12, oc12, oab4 = ops
-        eqn_constraints = [
-            (["a1","b1","c1"], oab1), (["a4","b4","c4"], oab4),
-            (["a1","a2","a3","a4"], oa12), (["c1","c2","c3","c4"], oc12)]
-    else:
-        (oab1, oef1, oa12, oc12, oe12, og12, ocd2, oab4, oef4, ob45, of45,
-         oab6, oef6, oa67, oc67, oe67, og67, ocd7, oab9, oef9) = ops
-        eqn_constraints = [
-            (["a1","b1","c1"], oab1),      (["e1","f1","g1"], oef1), (["c2","d2","e2"], ocd2),
-            (["a4","b4","c4"], oab4),      (["e4","f4","g4"], oef4),
-            (["a6","b6","c6"], oab6),      (["e6","f6","g6"], oef6), (["c7","d7","e7"], ocd7),
-            (["a9","b9","c9"], oab9),      (["e9","f9","g9"], oef9),
-            (["a1","a2","a3","a4"], oa12), (["c1","c2","c3","c4"], oc12),
-            (["e1","e2","e3","e4"], oe12), (["g1","g2","g3","g4"], og12),
-            (["b4","b5","b6"], ob45),      (["f4","f5","f6"], of45),
-            (["a6","a7","a8","a9"], oa67), (["c6","c7","c8","c9"], oc67),
-            (["e6","e7","e8","e9"], oe67), (["g6","g7","g8","g9"], og67)]
-
-    return [([zvars_dict[dgt_name] for dgt_name in dgt_names], op)
-            for dgt_names, op in eqn_constraints]
+    eqn_template = CYCLE_EQN_TEMPLATE if shape == "cycle" else GRID_EQN_TEMPLATE
+    return [([zvars_dict[dgt_name] for dgt_name in dgt_names], ops[op_index])
+            for dgt_names, op_index in eqn_template]
 
 
 # pylint: disable=too-many-locals
@@ -139,6 +189,10 @@ def solve_puzzle(shape: str, digits_in: List, ops: List[str], bool_print=False)
     sharing digits at 2 intersections. Each placeholder ``"_"`` in ``digits_in``
     represents an unknown digit that will be solved for.
 
+    Cycles are solved by the backtracking search of ``native_solver``, which is
+    much faster than setting up Z3 for 10 digits. Grid solutions are memoized
+    (see ``solve_puzzle_cached``), so solving the same grid again does not call Z3.
+
     Parameters
     ----------
     digits_in : list
@@ -161,34 +215,135 @@ def solve_puzzle(shape: str, digits_in: List, ops: List[str], bool_print=False)
     """
     assert shape in ["cycle", "grid"], "'shape' must be either 'cycle' or 'grid'"
 
+    if shape == "cycle":
+        digits_out = find_solution(shape, digits_in, ops)
+    else:
+        # Normalized (hashable) inputs, used as the cache key; a new list is returned
+        # so that callers cannot alter the cached solution
+        digits_out = list(solve_puzzle_cached(shape, tuple(digits_in),
+                                              tuple(op.strip() for op in ops)))
+
+    if not digits_out:
+        LOGGER.debug("No solution found")
+    elif bool_print:
+        _, zvars = build_z3_vars(shape)
+        for z, d in zip(zvars, digits_out):
+            print(f"{z} = {d}")
+
+    return digits_out
+
+
+@lru_cache(maxsize=64)
+def build_base_solver(shape: str, ops: Tuple[str, ...]) -> Tuple[Solver, List[BitVecRef]]:
+    """Return a Z3 solver holding the equation constraints of a puzzle.
+
+    Solvers are cached per shape and operators: the digit constraints of each
+    puzzle are added inside a ``push``/``pop`` scope (see ``solve_puzzle_cached``),
+    so the variables and equations are only built once.
+
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+    ops : tuple of str
+        Arithmetic operators, stripped (among ``"+"``, ``"-"``, ``"*"``).
+
+    Returns
+    -------
+    zsolver : z3.Solver
+        Solver holding the equation constraints only.
+    zvars : list[BitVecRef]
+        List of Z3 bit-vector variables in the order defined by the puzzle layout.
+    """
     zsolver = Solver()
+    zvars_dict, zvars = build_z3_vars(shape)
+    zsolver.add(*[make_equation_constraint(these_zvars, op)
+                  for these_zvars, op in build_equation_constraints(shape, ops, zvars_dict)])
+    return (zsolver, zvars)
+
+
+@lru_cache(maxsize=512)
+def solve_puzzle_cached(shape: str, digits_in: Tuple, ops: Tuple[str, ...]) -> Tuple[int, ...]:
+    """Solve a cycle or a full grid with Z3, memoizing the solutions.
 
-    # Digit constraints
-    zvars_dict, zvars, tens = build_z3_vars(shape)
-    for d, z in zip(digits_in, zvars):
-        if isinstance(d, int):
-            # Puzzle-specific
-            zsolver.add(z == d)
-        elif z in tens:
-            # Int must be two digits
-            zsolver.add(z >= 1, z <= 9)
-        else:
-            zsolver.add(z >= 0, z <= 9)
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzle.
+    digits_in : tuple
+        Input digits and placeholders ``"_"``, in the same order as for ``solve_puzzle``.
+    ops : tuple of str
+        Arithmetic operators, stripped (among ``"+"``, ``"-"``, ``"*"``).
+
+    Returns
+    -------
+    tuple of int
+        Solved digits, or an empty tuple if no solution is found.
+    """
+    # Domains of the digits, pruned by the propagation of native_solver (the tens
+    # digits, which cannot be zero, start from 1): an inconsistent puzzle is
+    # rejected without calling Z3, and the bounds given to Z3 are tightened
+    domains = prune_domains(shape, list(digits_in), list(ops))
+    if not domains:
+        return ()
 
     # Equation constraints
-    eqn_constraints = build_equation_constraints(shape, ops, zvars_dict)
-    for these_zvars, op in eqn_constraints:
-        add_equation_constraint(these_zvars, op, zsolver)
-
-    # Resolution
-    if zsolver.check() == sat:
-        model = zsolver.model()
-        if bool_print:
-            for z in zvars:
-                print(f"{z} = {model[z]}")
-        digits_out = [int(model[z].as_long()) for z in zvars]
-    else:
-        print("No solution found")
-        digits_out = []
+    zsolver, zvars = build_base_solver(shape, ops)
+
+    zsolver.push()
+    try:
+        # Digit constraints (prebuilt, picked by value), added in a single call
+        digit_constraints = []
+        for (equal, at_least, at_most), dom in zip(build_digit_constraints(shape), domains):
+            low, high = (dom & -dom).bit_length() - 1, dom.bit_length() - 1
+            if low == high:
+                # Puzzle-specific, or forced by the other digits
+                digit_constraints.append(equal[high])
+            else:
+                if low:
+                    digit_constraints.append(at_least[low])
+                digit_constraints.append(at_most[high])
+        zsolver.add(*digit_constraints)
+
+        # Resolution
+        if zsolver.check() != sat:
+            return ()
+        packed = zsolver.model().eval(build_packed_digits(shape), model_completion=True).as_long()
+        mask = (1 << DIGIT_BITS) - 1
+        return tuple(packed >> (DIGIT_BITS*i) & mask for i in range(len(zvars)))
+    finally:
+        zsolver.pop()
+
+
+def solve_puzzles_batch(shape: str, puzzles: Sequence[Tuple[List, List[str]]],
+                        max_workers: Optional[int] = None) -> List[List[int]]:
+    """Solve several cycles or full grids in parallel worker processes.
+
+    Each worker has its own Z3 context, and keeps its caches (see
+    ``solve_puzzle_cached``) from one puzzle to the next.
 
-    return digits_out
+    Parameters
+    ----------
+    shape : {"cycle", "grid"}
+        Shape of the puzzles.
+    puzzles : sequence of tuple(list, list[str])
+        Input digits and operators of each puzzle, as for ``solve_puzzle``.
+    max_workers : int, optional
+        Number of worker processes. Default is the number of processors.
+
+    Returns
+    -------
+    list of list of int
+        Solved digits of each puzzle, in the same order, or an empty list
+        for a puzzle without solution.
+    """
+    if not puzzles:
+        return []
+
+    max_workers = max_workers or os.cpu_count() or 1
+    # a few chunks per worker: fewer round trips, still balanced
+    chunksize = max(1, len(puzzles) // (4 * max_workers))
+    all_digits_in, all_ops = zip(*puzzles)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(partial(solve_puzzle, shape), all_digits_in, all_ops,
+                                 chunksize=chunksize))
@@ -0,0 +1,212 @@
+"""
+Tests of the rendering of puzzles (solver/display.py).
+
+The expected outputs are those of the original implementation, which rendered
+each puzzle with an f-string and textwrap.dedent; colors are stripped.
+"""
+
+import re
+
+import pytest
+
+from solver.display import BLD, DEF, RED, YLW, colorize, display_init_and_sol, display_puzzle
+
+from .test_native_solver import PUZZLES
+
+ANSI_CODES = re.compile(r"\033\[[0-9;]*m")
+
+_, CYCLE_IN, CYCLE_OPS, CYCLE_OUT = PUZZLES[0]
+_, GRID_IN, GRID_OPS, GRID_OUT = PUZZLES[3]
+
+# Digits with " " placeholders, some of which leave whole rows blank
+CYCLE_BLANKS = [" ", 1, "?", " ", " ", "X", 3, 0, 6, " "]
+GRID_BLANKS = GRID_IN[:6] + [" "]*5 + GRID_IN[11:21] + [" "]*2 + GRID_IN[23:]
+
+# cycle puzzle
+CYCLE = "\n".join([
+    "",
+    "_ * 1 = _",
+    "+       *",
+    "6       _",
+    "=       =",
+    "_       3",
+    "0 + 6 = _",
+    "",
+])
+
+# grid puzzle
+GRID = "\n".join([
+    "",
+    "_ + _ = _       4 - _ = 1",
+    "*       *       +       +",
+    "5       _ * _ = _       _",
+    "=       =       =       =",
+    "1       3       _       _",
+    "0 + _ = _       0 + _ = 0",
+    "    +               +",
+    "    _               _",
+    "    =               =",
+    "8 - _ = _       5 - 0 = 5",
+    "*       *       +       +",
+    "_       _ + 0 = 7       _",
+    "=       =       =       =",
+    "1       5       1       _",
+    "6 * _ = 6       _ * 2 = 4",
+    "",
+])
+
+# cycle with blank rows (emptied)
+CYCLE_WITH_BLANKS = "\n".join([
+    "",
+    "  * 1 = ?",
+    "+       *",
+    "",
+    "=       =",
+    "X       3",
+    "0 + 6 =  ",
+    "",
+])
+
+# grid with blank rows (emptied)
+GRID_WITH_BLANKS = "\n".join([
+    "",
+    "_ + _ = _       4 - _ = 1",
+    "*       *       +       +",
+    "          *   =          ",
+    "=       =       =       =",
+    "1       3       _       _",
+    "0 + _ = _       0 + _ = 0",
+    "    +               +",
+    "",
+    "    =               =",
+    "8 - _ = _       5 - 0 = 5",
+    "*       *       +       +",
+    "_       _ + 0 = 7       _",
+    "=       =       =       =",
+    "1       5       1       _",
+    "6 * _ = 6       _ * 2 = 4",
+    "",
+])
+
+# cycle and its solution
+CYCLE_AND_SOLUTION = "\n".join([
+    "",
+    "  Puzzle    ->    Solution",
+    "                  ",
+    "_ * 1 = _         4 * 1 = 4",
+    "+       *         +       *",
+    "6       _         6       9",
+    "=       =         =       =",
+    "_       3         1       3",
+    "0 + 6 = _         0 + 6 = 6",
+    "",
+])
+
+# grid and its solution
+GRID_AND_SOLUTION = "\n".join([
+    "",
+    "          Puzzle            ->            Solution",
+    "                                  ",
+    "_ + _ = _       4 - _ = 1         2 + 3 = 5       4 - 3 = 1",
+    "*       *       +       +         *       *       +       +",
+    "5       _ * _ = _       _         5       6 * 1 = 6       9",
+    "=       =       =       =         =       =       =       =",
+    "1       3       _       _         1       3       1       1",
+    "0 + _ = _       0 + _ = 0         0 + 0 = 0       0 + 0 = 0",
+    "    +               +                 +               +",
+    "    _               _                 0               0",
+    "    =               =                 =               =",
+    "8 - _ = _       5 - 0 = 5         8 - 0 = 8       5 - 0 = 5",
+    "*       *       +       +         *       *       +       +",
+    "_       _ + 0 = 7       _         2       7 + 0 = 7       9",
+    "=       =       =       =         =       =       =       =",
+    "1       5       1       _         1       5       1       1",
+    "6 * _ = 6       _ * 2 = 4         6 * 1 = 6       2 * 2 = 4",
+    "",
+])
+
+# cycle with blank rows and its solution (padded)
+CYCLE_WITH_BLANKS_AND_SOLUTION = "\n".join([
+    "",
+    "  Puzzle    ->    Solution",
+    "                  ",
+    "  * 1 = ?         4 * 1 = 4",
+    "+       *         +       *",
+    "                  6       9",
+    "=       =         =       =",
+    "X       3         1       3",
+    "0 + 6 =           0 + 6 = 6",
+    "",
+])
+
+# cycle and a solution with blank rows (cut after the gap)
+CYCLE_AND_BLANKS = "\n".join([
+    "",
+    "  Puzzle    ->    Solution",
+    "                  ",
+    "_ * 1 = _           * 1 = ?",
+    "+       *         +       *",
+    "6       _         ",
+    "=       =         =       =",
+    "_       3         X       3",
+    "0 + 6 = _         0 + 6 =  ",
+    "",
+])
+
+# grid with blank rows and its solution (padded)
+GRID_WITH_BLANKS_AND_SOLUTION = "\n".join([
+    "",
+    "          Puzzle            ->            Solution",
+    "                                  ",
+    "_ + _ = _       4 - _ = 1         2 + 3 = 5       4 - 3 = 1",
+    "*       *       +       +         *       *       +       +",
+    "          *   =                   5       6 * 1 = 6       9",
+    "=       =       =       =         =       =       =       =",
+    "1       3       _       _         1       3       1       1",
+    "0 + _ = _       0 + _ = 0         0 + 0 = 0       0 + 0 = 0",
+    "    +               +                 +               +",
+    "                                      0               0",
+    "    =               =                 =               =",
+    "8 - _ = _       5 - 0 = 5         8 - 0 = 8       5 - 0 = 5",
+    "*       *       +       +         *       *       +       +",
+    "_       _ + 0 = 7       _         2       7 + 0 = 7       9",
+    "=       =       =       =         =       =       =       =",
+    "1       5       1       _         1       5       1       1",
+    "6 * _ = 6       _ * 2 = 4         6 * 1 = 6       2 * 2 = 4",
+    "",
+])
+
+
+@pytest.mark.parametrize("shape, digits, ops, expected", [
+    ("cycle", CYCLE_IN, CYCLE_OPS, CYCLE),
+    ("grid", GRID_IN, GRID_OPS, GRID),
+    ("cycle", CYCLE_BLANKS, CYCLE_OPS, CYCLE_WITH_BLANKS),
+    ("grid", GRID_BLANKS, GRID_OPS, GRID_WITH_BLANKS),
+])
+def test_display_puzzle(capsys, shape, digits, ops, expected):
+    """Render a puzzle, and print it only when asked to."""
+    assert display_puzzle(shape, digits, ops, bool_print=False) == expected
+    assert capsys.readouterr().out == ""
+    display_puzzle(shape, digits, ops)
+    assert capsys.readouterr().out == expected + "\n"
+
+
+@pytest.mark.parametrize("shape, digits_in, digits_out, ops, expected", [
+    ("cycle", CYCLE_IN, CYCLE_OUT, CYCLE_OPS, CYCLE_AND_SOLUTION),
+    ("grid", GRID_IN, GRID_OUT, GRID_OPS, GRID_AND_SOLUTION),
+    ("cycle", CYCLE_BLANKS, CYCLE_OUT, CYCLE_OPS, CYCLE_WITH_BLANKS_AND_SOLUTION),
+    ("cycle", CYCLE_IN, CYCLE_BLANKS, CYCLE_OPS, CYCLE_AND_BLANKS),
+    ("grid", GRID_BLANKS, GRID_OUT, GRID_OPS, GRID_WITH_BLANKS_AND_SOLUTION),
+])
+def test_display_init_and_sol(capsys, shape, digits_in, digits_out, ops, expected):
+    """Print a puzzle and its solution side by side, under a header."""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    display_init_and_sol(shape, digits_in, digits_out, ops)
+    assert ANSI_CODES.sub("", capsys.readouterr().out) == expected
+
+
+def test_colorize():
+    """Color each run of the same special character once, spaces in between included."""
+    assert colorize("_ + _ = 5   =") == (f"{RED}_{DEF} {YLW}+{DEF} {RED}_{DEF} {BLD}={DEF} 5   "
+                                         f"{BLD}={DEF}")
+    assert colorize("6 _ _ * -") == f"6 {RED}_ _{DEF} {YLW}* -{DEF}"
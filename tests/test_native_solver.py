@@ -0,0 +1,235 @@
+"""
+Tests of the backtracking solver (solver/native_solver.py).
+
+Its results are cross-checked against a plain Z3 model of the puzzle, which does
+not use the propagation of the native solver. Since a puzzle may have several
+solutions, a solution is accepted as long as it satisfies all the equations and
+keeps the input digits; only the satisfiability must agree.
+"""
+
+import operator
+import random
+
+import pytest
+from z3 import Solver, ULE, sat
+
+from solver import native_solver
+from solver.native_solver import solve_puzzle_native
+from solver.solver import (CYCLE_DIGIT_NAMES, GRID_DIGIT_NAMES, CYCLE_EQN_TEMPLATE,
+                           GRID_EQN_TEMPLATE, build_equation_constraints, build_z3_vars,
+                           make_equation_constraint)
+
+OP_FUNCS = {"+": operator.add, "-": operator.sub, "*": operator.mul}
+
+# Names of the digits in the tens position, which cannot be zero unless given
+CYCLE_TEN_NAMES = ("a3", "c3")
+GRID_TEN_NAMES = ("a3", "c3", "e3", "g3", "a8", "c8", "e8", "g8")
+
+# (shape, input digits, operators, a solution)
+PUZZLES = [
+    ("cycle", ["_", 1, "_", 6, "_", "_", 3, 0, 6, "_"], ["*", "+", "*", "+"],
+     [4, 1, 4, 6, 9, 1, 3, 0, 6, 6]),
+    ("cycle", ["_", "_", 9, 8, 4, 1, "_", "_", 3, 3], ["+", "*", "+", "-"],
+     [2, 7, 9, 8, 4, 1, 1, 6, 3, 3]),
+    ("cycle", [7, "_", "_", "_", 7, "_", 5, "_", 1, "_"], ["+", "*", "*", "*"],
+     [7, 1, 8, 8, 7, 5, 5, 6, 1, 6]),
+    ("grid", ["_", "_", "_", 4, "_", 1, 5, "_", "_", "_", "_", 1, 3, "_", "_", 0, "_", "_", 0, "_",
+              0, "_", "_", 8, "_", "_", 5, 0, 5, "_", "_", 0, 7, "_", 1, 5, 1, "_", 6, "_", 6, "_",
+              2, 4],
+     ["+", "-", "*", "*", "+", "+", "*", "+", "+", "+", "+", "-", "-", "*", "*", "+", "+", "+",
+      "*", "*"],
+     [2, 3, 5, 4, 3, 1, 5, 6, 1, 6, 9, 1, 3, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 8, 5, 0, 5, 2,
+      7, 0, 7, 9, 1, 5, 1, 1, 6, 1, 6, 2, 2, 4]),
+    ("grid", [2, 2, "_", 8, "_", 2, "_", "_", 4, "_", "_", 1, "_", "_", 1, "_", 0, 0, "_", "_",
+              6, "_", 1, 5, "_", 5, 5, 1, "_", "_", 2, "_", "_", 8, 3, "_", 1, 4, "_", 0, "_", 0,
+              "_", "_"],
+     ["+", "-", "*", "+", "*", "*", "-", "+", "+", "+", "+", "-", "*", "*", "*", "*", "*", "+",
+      "-", "-"],
+     [2, 2, 4, 8, 6, 2, 5, 6, 4, 2, 8, 1, 1, 1, 1, 0, 0, 0, 6, 0, 6, 0, 1, 5, 0, 5, 5, 1, 5, 6,
+      2, 0, 2, 8, 3, 1, 1, 4, 0, 0, 0, 0, 0, 0]),
+    ("grid", ["_", 6, 3, 2, 1, 2, "_", 9, "_", "_", "_", "_", 2, "_", 1, "_", "_", "_", 0, 0,
+              "_", 1, 0, 2, "_", 2, 3, 0, "_", "_", 8, "_", "_", 9, "_", "_", 1, "_", 0, 0, 0, 1,
+              "_", "_"],
+     ["-", "*", "*", "*", "*", "*", "-", "*", "*", "*", "+", "*", "+", "*", "+", "+", "*", "*",
+      "*", "*"],
+     [9, 6, 3, 2, 1, 2, 3, 9, 4, 5, 5, 2, 2, 1, 1, 7, 1, 7, 0, 0, 0, 1, 0, 2, 1, 2, 3, 0, 3, 5,
+      8, 1, 8, 9, 1, 1, 1, 2, 0, 0, 0, 1, 7, 7]),
+]
+
+UNSATISFIABLE_PUZZLES = [
+    # 9 + 9 = 9
+    ("cycle", [9]*10, ["+"]*4),
+    # a1 + b1 = c1 with a1 = b1 = 2 and c1 = 5
+    ("grid", [2, 2, 5] + ["_"]*41, ["+"]*20),
+    # a9 * b9 = c9 with a9 = 3, b9 = 3 and c9 = 8, in the last equations of the grid
+    ("grid", ["_"]*38 + [3, 3, 8] + ["_"]*3, ["*"]*20),
+]
+
+
+def z3_solution(shape, digits_in, ops):
+    """Solve a puzzle with a fresh Z3 solver and plain digit bounds (no domain pruning)."""
+    names, ten_names = ((CYCLE_DIGIT_NAMES, CYCLE_TEN_NAMES) if shape == "cycle"
+                        else (GRID_DIGIT_NAMES, GRID_TEN_NAMES))
+    zvars_dict, zvars = build_z3_vars(shape)
+    zsolver = Solver()
+    zsolver.add(*[make_equation_constraint(these_zvars, op)
+                  for these_zvars, op in build_equation_constraints(shape, ops, zvars_dict)])
+    for name, z, d in zip(names, zvars, digits_in):
+        if isinstance(d, int):
+            zsolver.add(z == d)
+        else:
+            zsolver.add(ULE(1 if name in ten_names else 0, z), ULE(z, 9))
+    if zsolver.check() != sat:
+        return []
+    model = zsolver.model()
+    return [model.eval(z, model_completion=True).as_long() for z in zvars]
+
+
+def assert_valid_solution(shape, digits_in, ops, digits_out):
+    """Check that a solution keeps the input digits and satisfies all equations."""
+    if shape == "cycle":
+        names, ten_names, template = CYCLE_DIGIT_NAMES, CYCLE_TEN_NAMES, CYCLE_EQN_TEMPLATE
+    else:
+        names, ten_names, template = GRID_DIGIT_NAMES, GRID_TEN_NAMES, GRID_EQN_TEMPLATE
+
+    assert len(digits_out) == len(digits_in)
+    for d_in, d_out in zip(digits_in, digits_out):
+        assert isinstance(d_out, int) and 0 <= d_out <= 9
+        assert not isinstance(d_in, int) or d_in == d_out
+
+    values = dict(zip(names, digits_out))
+    given = dict(zip(names, digits_in))
+    for name in ten_names:
+        # an unknown tens digit cannot be zero
+        assert values[name] != 0 or isinstance(given[name], int)
+    assert_equations_hold(template, ops, values)
+
+
+def assert_equations_hold(template, ops, values):
+    """Check that the digit values (by name) satisfy all equations of a template."""
+    for dgt_names, op_index in template:
+        dgts = [values[name] for name in dgt_names]
+        rhs = dgts[2] if len(dgts) == 3 else 10*dgts[2] + dgts[3]
+        assert OP_FUNCS[ops[op_index]](dgts[0], dgts[1]) == rhs, (dgt_names, ops[op_index])
+
+
+def random_puzzles(nb_puzzles, seed):
+    """Derive puzzles from the reference ones: blank most digits, alter some values."""
+    rnd = random.Random(seed)
+    puzzles = []
+    for _ in range(nb_puzzles):
+        shape, _, ops, solution = rnd.choice(PUZZLES)
+        digits_in = [d if rnd.random() < 0.35 else "_" for d in solution]
+        ops = list(ops)
+        if rnd.random() < 0.5:
+            digits_in[rnd.randrange(len(digits_in))] = rnd.randint(0, 9)
+        if rnd.random() < 0.3:
+            ops[rnd.randrange(len(ops))] = rnd.choice("+-*")
+        puzzles.append((shape, digits_in, ops))
+    return puzzles
+
+
+@pytest.mark.parametrize("shape, digits_in, ops, solution", PUZZLES)
+def test_reference_puzzles(shape, digits_in, ops, solution):
+    """Solve the reference puzzles, whose listed solutions are checked too."""
+    digits_out = solve_puzzle_native(shape, digits_in, ops)
+    assert_valid_solution(shape, digits_in, ops, digits_out)
+    assert_valid_solution(shape, digits_in, ops, solution)
+
+
+@pytest.mark.parametrize("shape, digits_in, ops", UNSATISFIABLE_PUZZLES)
+def test_unsatisfiable_puzzles(shape, digits_in, ops):
+    """Report puzzles with contradictory given digits as unsatisfiable."""
+    assert not z3_solution(shape, digits_in, ops)
+    assert solve_puzzle_native(shape, digits_in, ops) == []
+
+
+@pytest.mark.parametrize("shape, digits_in, ops", random_puzzles(120, seed=1))
+def test_cross_check_with_z3(shape, digits_in, ops):
+    """Agree with Z3 on the satisfiability of random puzzles."""
+    digits_out = solve_puzzle_native(shape, digits_in, ops)
+    assert bool(digits_out) == bool(z3_solution(shape, digits_in, ops))
+    if digits_out:
+        assert_valid_solution(shape, digits_in, ops, digits_out)
+
+
+@pytest.fixture
+def no_pruning(monkeypatch):
+    """Leave the domains unpruned, so that the search does all the work.
+
+    Propagation is still run on a copy of the domains, as it is what rejects the
+    equations whose digits are all given.
+    """
+    propagate = native_solver.propagate
+    monkeypatch.setattr(native_solver, "propagate",
+                        lambda domains, *args: propagate(list(domains), *args))
+
+
+@pytest.mark.parametrize("shape, digits_in, ops", [
+    ("cycle", ["_", 1, "_", 8, 7, "_", "_", "_", 1, "_"], ["*"]*4),
+    ("cycle", ["_", 4, "_", "_", 6, "_", "_", "_", 3, "_"], ["+", "*", "+", "-"]),
+    ("grid", ["_"]*9 + [6, "_", "_", 3, "_", "_", 0, "_", 0, "_", "_", "_", 5] + ["_"]*7
+     + [2] + ["_"]*9 + [1, "_", "_", 2, "_"],
+     ["+", "-", "*", "*", "+", "+", "*", "+", "+", "+", "+", "-", "-", "+", "*", "+", "+", "+",
+      "*", "*"]),
+])
+def test_backjumping_unsatisfiable(shape, digits_in, ops):
+    """Prove with the search alone that arc consistent puzzles have no solution."""
+    # Arc consistent puzzles: only the search can tell they have no solution
+    assert native_solver.prune_domains(shape, digits_in, ops)
+    assert not z3_solution(shape, digits_in, ops)
+    assert native_solver.find_solution(shape, digits_in, ops) == []
+
+
+@pytest.mark.parametrize("shape, digits_in, ops",
+                         [puzzle[:3] for puzzle in PUZZLES] + random_puzzles(60, seed=2))
+def test_backjumping_cross_check_with_z3(no_pruning, shape, digits_in, ops):
+    """Agree with Z3 when the search works on unpruned domains."""
+    # pylint: disable=redefined-outer-name,unused-argument
+    # A backjump past a digit that was not in conflict would skip some of its
+    # values, and could drop the only solutions of the puzzle
+    digits_out = native_solver.find_solution(shape, digits_in, ops)
+    assert bool(digits_out) == bool(z3_solution(shape, digits_in, ops))
+    if digits_out:
+        assert_valid_solution(shape, digits_in, ops, digits_out)
+
+
+def test_propagate_empty_domain():
+    """Report a failure when pruning empties a domain."""
+    # a + b = c with a = 9, b in {1, 2} and c in {0, 1}: no value of b fits
+    domains = [1 << 9, 0b110, 0b11]
+    results = [native_solver.RESULT_DIGITS[0]]
+    assert not native_solver.propagate(domains, ((0, 1, 2),), results, ((0,), (0,), (0,)))
+
+
+@pytest.mark.parametrize("shape, digits_in, ops", UNSATISFIABLE_PUZZLES)
+def test_prune_domains_unsatisfiable(shape, digits_in, ops):
+    """Return no domains for puzzles with contradictory given digits."""
+    assert native_solver.prune_domains(shape, digits_in, ops) == []
+
+
+def test_prune_domains_given_zero_tens():
+    """Keep a tens digit given as 0, and exclude 0 from unknown tens digits."""
+    # a1 + a2 = a3a4 with a3 given as 0: the sum has a single digit
+    digits_in = ["_"]*5 + [0] + ["_"]*4
+    ops = ["+"]*4
+    domains = native_solver.prune_domains("cycle", digits_in, ops)
+    assert domains[5] == 1 << 0
+    # c1 + c2 = c3c4 with c3 unknown: a two-digit sum of two digits starts with 1
+    assert domains[6] == 1 << 1
+
+    digits_out = native_solver.find_solution("cycle", digits_in, ops)
+    assert digits_out[5] == 0
+    assert_valid_solution("cycle", digits_in, ops, digits_out)
+
+
+@pytest.mark.parametrize("shape, digits_in, ops", random_puzzles(60, seed=3))
+def test_prune_domains_keeps_solutions(shape, digits_in, ops):
+    """Keep the values of the Z3 solution in the pruned domains."""
+    # Pruning only removes values that belong to no solution (the Z3 model does
+    # not use the pruned domains)
+    domains = native_solver.prune_domains(shape, digits_in, ops)
+    digits_out = z3_solution(shape, digits_in, ops)
+    assert bool(domains) or not digits_out
+    for dom, digit in zip(domains, digits_out):
+        assert dom >> digit & 1
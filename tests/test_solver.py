@@ -0,0 +1,36 @@
+"""
+Tests of the solving functions of solver/solver.py (Z3 for full grids).
+"""
+
+from solver.solver import solve_puzzle, solve_puzzles_batch
+
+from .test_native_solver import PUZZLES, UNSATISFIABLE_PUZZLES, assert_valid_solution
+
+GRIDS = [puzzle[1:3] for puzzle in PUZZLES if puzzle[0] == "grid"]
+UNSATISFIABLE_GRIDS = [puzzle[1:] for puzzle in UNSATISFIABLE_PUZZLES if puzzle[0] == "grid"]
+
+
+def test_solve_puzzle_grids():
+    """Solve the reference grids."""
+    for digits_in, ops in GRIDS:
+        assert_valid_solution("grid", digits_in, ops, solve_puzzle("grid", digits_in, ops))
+    for digits_in, ops in UNSATISFIABLE_GRIDS:
+        assert solve_puzzle("grid", digits_in, ops) == []
+
+
+def test_solve_puzzles_batch():
+    """Return the solutions in the order of the puzzles, [] for an unsatisfiable one."""
+    puzzles = GRIDS[:2] + UNSATISFIABLE_GRIDS[:1] + GRIDS[2:] + GRIDS[:1]
+    all_digits_out = solve_puzzles_batch("grid", puzzles, max_workers=2)
+
+    assert len(all_digits_out) == len(puzzles)
+    assert all_digits_out[2] == []
+    for i, ((digits_in, ops), digits_out) in enumerate(zip(puzzles, all_digits_out)):
+        if i != 2:
+            assert_valid_solution("grid", digits_in, ops, digits_out)
+
+
+def test_solve_puzzles_batch_empty():
+    """Return an empty list for no puzzles."""
+    all_digits_out = solve_puzzles_batch("grid", [], max_workers=2)
+    assert isinstance(all_digits_out, list) and not all_digits_out